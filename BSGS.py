@@ -1,12 +1,19 @@
-from math import sqrt
+import hashlib
+import mmap
+import os
+import tempfile
+from math import isqrt, sqrt
+from multiprocessing import Pool, shared_memory
 from operator import mod
 
 import numpy as np
 
 import FiniteField
 import FiniteFieldElement
+from instrumentation import instrumented
 
 
+@instrumented
 def find_in_dict(dictionary, vector):
     """
     This function finds a vector in a dictionary of vectors.
@@ -22,6 +29,7 @@ def find_in_dict(dictionary, vector):
     return None, None
 
 
+@instrumented
 def create_baby_steps(l: FiniteField, g: FiniteFieldElement, m: int):
     """
     This function creates the baby steps dictionary for the BSGS algorithm.
@@ -50,6 +58,7 @@ def create_baby_steps(l: FiniteField, g: FiniteFieldElement, m: int):
     return baby_steps_dictionary
 
 
+@instrumented
 def BSGS(l: FiniteField, g: FiniteFieldElement, h: FiniteFieldElement):
     # sanity checks for the input values
     if g.l != h.l:
@@ -75,3 +84,346 @@ def BSGS(l: FiniteField, g: FiniteFieldElement, h: FiniteFieldElement):
             # element h
         j += 1  # increment the giant step index
     raise ValueError("The result is not found - are you sure the element is a generator?")
+
+
+def element_to_int(l: FiniteField, vector):
+    """
+    This function packs the coefficient vector of a field element into a single integer, reading the vector as the
+    base-p digits of the integer (a_0 is the least significant digit).
+    :param l: the finite field
+    :param vector: the coefficient vector [a_0, a_1, ..., a_(n-1)] of the element
+    :return: the packed integer, in the range [0, p^n - 1]
+
+    """
+    packed = 0
+    for coeff in reversed(vector):
+        packed = packed * l.p + int(coeff)
+    return packed
+
+
+class BabyStepTable:
+    """
+    This class represents the baby steps of the BSGS algorithm as two parallel int64 arrays: the packed baby step
+    elements sorted in ascending order and the exponent j such that g^j is the corresponding element.
+    A lookup is a binary search over the sorted array, so the table may live in a buffer shared between processes or
+    in a file memory-mapped read-only by them.
+    File format: a .npy file holding a (2, m) int64 array whose rows are the keys and the exponents.
+    """
+
+    def __init__(self, keys, exponents, shm=None, mapped_file=None, l=None):
+        """
+        Initialize a baby steps table.
+        :param keys: sorted int64 array of packed baby step elements
+        :param exponents: int64 array s.t. exponents[i] is the exponent of the baby step keys[i]
+        :param shm: the shared memory block backing the arrays, if any
+        :param mapped_file: the memory map of the table file backing the arrays, if any
+        :param l: the finite field of the baby steps, if known (used to label the instrumented lookups)
+        """
+        self.keys = keys
+        self.exponents = exponents
+        self.size = len(keys)
+        self.shm = shm
+        self.mapped_file = mapped_file
+        self.l = l
+
+    @classmethod
+    @instrumented
+    def build(cls, l: FiniteField, g: FiniteFieldElement, m: int):
+        """
+        This function computes the baby steps g^0, g^1, ..., g^(m-1) and stores them in a table.
+        :param l: the finite field
+        :param g: the generator element
+        :param m: the number of baby steps
+        :return: the baby steps table
+
+        """
+        if l.field_size > np.iinfo(np.int64).max:
+            raise ValueError("The field is too large for a packed baby steps table.")
+        packed_steps = np.empty(m, dtype=np.int64)
+        result = g ** 0  # the multiplicative identity element in the field
+        for j in range(m):
+            packed_steps[j] = element_to_int(l, result.a)
+            result = result * g  # the next baby step is computed from the previous one
+        # np.unique keeps the first (smallest) exponent of elements which repeat, in case g is not a generator
+        keys, exponents = np.unique(packed_steps, return_index=True)
+        return cls(keys, exponents.astype(np.int64), l=l)
+
+    @classmethod
+    def attach(cls, name: str, size: int):
+        """
+        This function attaches to a baby steps table previously placed in shared memory by share().
+        :param name: the name of the shared memory block
+        :param size: the number of entries in the table
+        :return: the baby steps table backed by the shared memory block
+
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        buffer = np.ndarray((2, size), dtype=np.int64, buffer=shm.buf)
+        return cls(buffer[0], buffer[1], shm)
+
+    @classmethod
+    def load(cls, path):
+        """
+        This function memory-maps a baby steps table previously written by save(). The file is mapped read-only and
+        lookups run directly against the mapped buffer.
+        :param path: the path of the table file
+        :return: the baby steps table backed by the mapped file
+
+        """
+        header_readers = {(1, 0): np.lib.format.read_array_header_1_0, (2, 0): np.lib.format.read_array_header_2_0}
+        with open(path, 'rb') as table_file:
+            version = np.lib.format.read_magic(table_file)
+            if version not in header_readers:
+                raise ValueError(f"{path} is not a baby steps table file")
+            shape, fortran_order, dtype = header_readers[version](table_file)
+            if len(shape) != 2 or shape[0] != 2 or dtype != np.int64 or fortran_order:
+                raise ValueError(f"{path} is not a baby steps table file")
+            offset = table_file.tell()
+            mapped_file = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = np.ndarray(shape, dtype=np.int64, buffer=mapped_file, offset=offset)
+        return cls(buffer[0], buffer[1], mapped_file=mapped_file)
+
+    @classmethod
+    def cached(cls, directory, l: FiniteField, g: FiniteFieldElement, m: int):
+        """
+        This function returns the baby steps table of (l, g, m) from a directory of table files. The table is built and
+        written on first use, and memory-mapped from its file afterwards.
+        :param directory: the directory holding the table files
+        :param l: the finite field
+        :param g: the generator element
+        :param m: the number of baby steps
+        :return: the baby steps table backed by the mapped file
+
+        """
+        path = baby_steps_path(directory, l, g, m)
+        if not os.path.exists(path):
+            cls.build(l, g, m).save(path)
+        table = cls.load(path)
+        table.l = l
+        return table
+
+    def save(self, path):
+        """
+        This function writes the table to a file. The file is written under a temporary name and then renamed, so
+        concurrent readers never observe a partially written table.
+        :param path: the path of the table file
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as temp_file:
+            try:
+                np.save(temp_file, np.stack([self.keys, self.exponents]).astype(np.int64))
+            except BaseException:
+                temp_file.close()
+                os.unlink(temp_file.name)
+                raise
+        # temporary files are private to their owner, while tables are meant to be mapped by other users' processes
+        os.chmod(temp_file.name, 0o644)
+        os.replace(temp_file.name, path)
+
+    def share(self):
+        """
+        This function copies the table into a newly created shared memory block.
+        :return: the baby steps table backed by the shared memory block
+
+        """
+        size = len(self.keys)
+        shm = shared_memory.SharedMemory(create=True, size=max(2 * size * np.dtype(np.int64).itemsize, 1))
+        buffer = np.ndarray((2, size), dtype=np.int64, buffer=shm.buf)
+        buffer[0] = self.keys
+        buffer[1] = self.exponents
+        return BabyStepTable(buffer[0], buffer[1], shm, l=self.l)
+
+    @instrumented
+    def lookup(self, key: int):
+        """
+        This function finds the exponent of a packed element in the table.
+        :param key: the packed element to search for
+        :return: the exponent j of the baby step g^j equal to the element, or None if it is not a baby step
+
+        """
+        idx = np.searchsorted(self.keys, key)
+        if idx < len(self.keys) and self.keys[idx] == key:
+            return int(self.exponents[idx])
+        return None
+
+    def close(self):
+        """
+        This function detaches the table from its shared memory block or mapped file.
+        """
+        self.keys = self.exponents = None  # views into the buffer must be released before it is closed
+        if self.shm is not None:
+            self.shm.close()
+        if self.mapped_file is not None:
+            self.mapped_file.close()
+            self.mapped_file = None
+
+    def __len__(self):
+        return self.size
+
+
+def baby_steps_path(directory, l: FiniteField, g: FiniteFieldElement, m: int):
+    """
+    This function names the baby steps table file of (l, g, m) in a directory.
+    :param directory: the directory holding the table files
+    :param l: the finite field
+    :param g: the generator element
+    :param m: the number of baby steps
+    :return: the path of the table file
+
+    """
+    g_coeffs = [int(coeff) for coeff in g.a] + [0] * (l.f_x_degree - len(g.a))  # equal generators share one file
+    params = repr((l.p, [int(coeff) for coeff in l.f_x_monic], g_coeffs, int(m)))
+    return os.path.join(directory, f"baby_steps_{hashlib.sha256(params.encode()).hexdigest()[:32]}.npy")
+
+
+@instrumented
+def giant_steps(l: FiniteField, table: BabyStepTable, giant_element: FiniteFieldElement, m: int,
+                h: FiniteFieldElement):
+    """
+    This function performs the giant steps of the BSGS algorithm against a precomputed baby steps table.
+    :param l: the finite field
+    :param table: the baby steps table of the generator element g
+    :param giant_element: the giant step element g^(-m)
+    :param m: the number of baby steps
+    :param h: the element whose discrete logarithm is computed
+    :return: the exponent t such that g^t = h
+
+    """
+    if h.l != l:
+        raise ValueError("The elements must be from the same field.")
+    if h.is_0:
+        raise ValueError("The discrete logarithm of the zero element is not defined.")
+    result = h
+    for j in range(m):
+        baby_step_index = table.lookup(element_to_int(l, result.a))
+        if baby_step_index is not None:
+            return j * m + baby_step_index
+        result = result * giant_element  # h * g^(-m(j+1)) is computed from the previous giant step
+    raise ValueError("The result is not found - are you sure the element is a generator?")
+
+
+# per-process state of the BSGSSolver pool workers, set by _init_worker
+_worker_context = {}
+
+
+def _init_worker(l, giant_element, m, table_path, shm_name, table_size):
+    _worker_context["l"] = l
+    _worker_context["giant_element"] = giant_element
+    _worker_context["m"] = m
+    if table_path is not None:
+        _worker_context["table"] = BabyStepTable.load(table_path)
+    else:
+        _worker_context["table"] = BabyStepTable.attach(shm_name, table_size)
+
+
+def _solve_in_worker(h):
+    ctx = _worker_context
+    try:
+        return h, giant_steps(ctx["l"], ctx["table"], ctx["giant_element"], ctx["m"], h)
+    except ValueError as error:  # reported per target, so that the rest of the stream is still solved
+        return h, error
+
+
+class BSGSSolver:
+    """
+    This class solves many discrete logarithms to the same base g in a finite field l. The baby steps table of (l, g)
+    is computed once on construction and reused by every target.
+    Batches or streams of targets are spread across a pool of worker processes, which all read the same copy of the
+    baby steps table from shared memory, or from its memory-mapped file when a table directory is given.
+    NOTE: unlike BSGS(), the field size is not required to be a perfect square; m is taken as the ceiling of the square
+    root of the multiplicative group order.
+    """
+
+    def __init__(self, l: FiniteField, g: FiniteFieldElement, processes=None, table_dir=None):
+        """
+        Initialize a discrete logarithm solver.
+        :param l: the finite field
+        :param g: the generator element
+        :param processes: the number of worker processes used by solve_many (defaults to the number of CPUs)
+        :param table_dir: a directory of persistent baby steps table files; the table of (l, g) is read from it when
+        present, and written to it otherwise
+        """
+        if g.l != l:
+            raise ValueError("The generator must be an element of the given field.")
+        if g.is_0:
+            raise ValueError("The zero element cannot be a generator.")
+        self.l = l
+        self.g = g
+        self.processes = processes
+
+        group_order = l.field_size - 1
+        self.m = isqrt(group_order)
+        if self.m * self.m < group_order:
+            self.m += 1
+
+        if table_dir is not None:
+            self.table_path = baby_steps_path(table_dir, l, g, self.m)
+            self.table = BabyStepTable.cached(table_dir, l, g, self.m)
+        else:
+            self.table_path = None
+            self.table = BabyStepTable.build(l, g, self.m)
+        self.giant_element = g ** (-self.m)  # compute the giant step element (g^-m)
+        self._shared_table = None
+        self._pool = None
+
+    def solve(self, h: FiniteFieldElement):
+        """
+        Compute the discrete logarithm of a single element in the calling process.
+        :param h: the element whose discrete logarithm is computed
+        :return: the exponent t such that g^t = h
+        """
+        self._check_open()
+        return giant_steps(self.l, self.table, self.giant_element, self.m, h)
+
+    def solve_many(self, targets, chunksize=1):
+        """
+        Compute the discrete logarithms of a batch or a stream of elements in the worker pool.
+        Targets are consumed lazily and results are yielded in order of completion, not in order of submission.
+        A target which cannot be solved (the zero element, an element of another field, or an element outside the
+        subgroup generated by g) does not stop the stream; it is yielded with the ValueError raised for it instead of t.
+        :param targets: an iterable of elements whose discrete logarithms are computed
+        :param chunksize: the number of targets sent to a worker at a time
+        :return: a generator of (h, t) pairs such that g^t = h, or (h, error) for targets which cannot be solved
+        """
+        self._check_open()
+        pool = self._get_pool()
+        yield from pool.imap_unordered(_solve_in_worker, targets, chunksize)
+
+    def _check_open(self):
+        if self.table is None:
+            raise ValueError("The solver is closed.")
+
+    def _get_pool(self):
+        if self._pool is None:
+            shm_name = None
+            if self.table_path is None:  # workers map the table file when there is one
+                self._shared_table = self.table.share()
+                shm_name = self._shared_table.shm.name
+            self._pool = Pool(self.processes, initializer=_init_worker,
+                              initargs=(self.l, self.giant_element, self.m, self.table_path, shm_name,
+                                        len(self.table)))
+        return self._pool
+
+    def close(self):
+        """
+        Shut down the worker pool and release the baby steps table, including its shared memory copy or its mapped
+        file, if any. The solver cannot be used after it is closed.
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        if self._shared_table is not None:
+            shm = self._shared_table.shm
+            self._shared_table.close()
+            shm.unlink()
+            self._shared_table = None
+        if self.table is not None:
+            self.table.close()
+            self.table = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
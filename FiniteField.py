@@ -5,6 +5,7 @@ import numpy as np
 from galois import is_prime
 
 from FiniteFieldElement import FiniteFieldElement
+from instrumentation import instrumented
 from PrimeFieldElement import PrimeFieldElement
 
 
@@ -105,6 +106,7 @@ class FiniteField:
             # Yield the corresponding FiniteFieldElement
             yield FiniteFieldElement(self, reversed_coeffs)
 
+    @instrumented
     def find_generator(self):
         """
         Find a generator of the multiplicative group of the finite field.
@@ -2,6 +2,7 @@ import numpy as np
 import FiniteField
 import PrimeFieldElement
 from sympy import Matrix
+from instrumentation import instrumented
 
 
 class FiniteFieldElement:
@@ -15,6 +16,7 @@ class FiniteFieldElement:
     translated to this range via mod p operation
     """
 
+    @instrumented
     def __init__(self, l, a):
         """
         Initialize a finite field element.
@@ -39,6 +41,7 @@ class FiniteFieldElement:
 
             self.matrix_representation = self.calc_matrix_representation()
 
+    @instrumented
     def calc_matrix_representation(self):
         """
         The function calculates a matrix representation of the given element, a,
@@ -99,18 +102,21 @@ class FiniteFieldElement:
         print("matrix representation:")
         self.matrix_print()
 
+    @instrumented
     def __add__(self, other):
         if self.l != other.l:
             raise ValueError("Both elements must be above the same field")
         sum_coeffs = [(x + y) % self.l.p for x, y in zip(self.a, other.a)]
         return FiniteFieldElement(self.l, sum_coeffs)
 
+    @instrumented
     def __sub__(self, other):
         if self.l != other.l:
             raise ValueError("Both elements must be above the same field")
         sub_coeffs = [(x - y) % self.l.p for x, y in zip(self.a, other.a)]
         return FiniteFieldElement(self.l, sub_coeffs)
 
+    @instrumented
     def __mul__(self, other):
         if self.l != other.l:
             raise ValueError("Both elements must be above the same field")
@@ -122,6 +128,7 @@ class FiniteFieldElement:
                       coeffs]  # matrix elements should be above the prime which serves as the kernel of the finite field
         return FiniteFieldElement(self.l, coeffs_res)
 
+    @instrumented
     def __truediv__(self, other):
         """
         Perform division of two elements in the finite field.
@@ -162,6 +169,7 @@ class FiniteFieldElement:
 
         return FiniteFieldElement(other.l, result.tolist())
 
+    @instrumented
     def __pow__(self, exponent):
         e1_element = FiniteFieldElement(self.l, [1] + [0] * (
                 self.l.f_x_degree - 1))  # The multiplicative identity element in the field
@@ -185,6 +193,7 @@ class FiniteFieldElement:
             exponent //= 2  # Shift exponent to the right by 1 bit
         return result
 
+    @instrumented
     def multiplicative_order(self):
         """
         Compute the multiplicative order of the element.
@@ -0,0 +1,405 @@
+import itertools
+import os
+import random
+from math import exp, isqrt, log, sqrt
+from multiprocessing import Pool
+
+from galois import primes
+from sympy import factorint
+
+import FiniteField  # imported before FiniteFieldElement, which imports it in turn
+from FiniteFieldElement import FiniteFieldElement
+from PrimeFieldElement import PrimeFieldElement
+from utilities import xgcd
+
+
+def poly_trim(a):
+    """
+    This function removes the zero coefficients of the highest degrees of a polynomial.
+    :param a: the polynomial coefficients [a_0, a_1, ..., a_n]
+    :return: the polynomial coefficients without trailing zeros ([] for the zero polynomial)
+
+    """
+    a = list(a)
+    while a and a[-1] == 0:
+        a.pop()
+    return a
+
+
+def poly_divmod(a, b, p):
+    """
+    This function performs long division of polynomials above GF(p), where b is monic.
+    :param a: the dividend coefficients [a_0, a_1, ..., a_n]
+    :param b: the monic divisor coefficients [b_0, b_1, ..., b_m]
+    :param p: the prime that characterizes the prime field GF(p)
+    :return: the quotient and the remainder coefficients
+
+    """
+    remainder = poly_trim(coeff % p for coeff in a)
+    deg_b = len(b) - 1
+    if len(remainder) - 1 < deg_b:
+        return [], remainder
+    quotient = [0] * (len(remainder) - deg_b)
+    for shift in range(len(remainder) - 1 - deg_b, -1, -1):
+        coeff = remainder[shift + deg_b]
+        if coeff != 0:
+            quotient[shift] = coeff
+            for idx, b_coeff in enumerate(b):
+                remainder[shift + idx] = (remainder[shift + idx] - coeff * b_coeff) % p
+    return quotient, poly_trim(remainder[:deg_b])
+
+
+def irreducible_polynomials(p, max_degree):
+    """
+    This function lists the monic irreducible polynomials above GF(p) of degree 1 to max_degree. A polynomial is
+    irreducible if no monic irreducible polynomial of at most half its degree divides it.
+    :param p: the prime that characterizes the prime field GF(p)
+    :param max_degree: the highest degree of the listed polynomials
+    :return: list of polynomial coefficients [a_0, a_1, ..., 1] ordered by degree
+
+    """
+    irreducibles = []
+    for degree in range(1, max_degree + 1):
+        for lower_coeffs in itertools.product(range(p), repeat=degree):
+            candidate = list(lower_coeffs) + [1]
+            if all(poly_divmod(candidate, f, p)[1] for f in irreducibles if 2 * (len(f) - 1) <= degree):
+                irreducibles.append(candidate)
+    return irreducibles
+
+
+class PrimeFactorBase:
+    """
+    This class represents the factor base of index calculus in a prime field GF(p): the primes up to a smoothness
+    bound. An element is smooth if its representative in [1, p-1] factors over the base.
+    """
+
+    def __init__(self, p, bound):
+        """
+        Initialize a factor base of a prime field.
+        :param p: the prime that characterizes the prime field GF(p)
+        :param bound: the smoothness bound, the largest prime of the base is at most bound
+        """
+        self.p = p
+        self.base = [q for q in primes(min(bound, p - 1))]
+
+    def factor(self, element: PrimeFieldElement):
+        """
+        This function factors an element over the factor base.
+        :param element: a non-zero element of GF(p)
+        :return: the pair (0, exponents) where exponents maps base indices to exponents, or None if the element is not
+        smooth (the first item is the logarithm of the unit part of the element, which is 1 in a prime field)
+
+        """
+        value = element.a
+        exponents = {}
+        for idx, q in enumerate(self.base):
+            while value % q == 0:
+                value //= q
+                exponents[idx] = exponents.get(idx, 0) + 1
+        if value != 1:
+            return None
+        return 0, exponents
+
+    def __len__(self):
+        return len(self.base)
+
+
+class PolynomialFactorBase:
+    """
+    This class represents the factor base of index calculus in an extension field l of GF(p): the monic irreducible
+    polynomials above GF(p) up to a degree bound. An element is smooth if its polynomial representation of degree
+    below n factors over the base, up to a constant of GF(p)^*.
+    """
+
+    def __init__(self, g: FiniteFieldElement, max_degree):
+        """
+        Initialize a factor base of an extension field.
+        :param g: the generator element of the field
+        :param max_degree: the degree bound of the base polynomials
+        """
+        l = g.l
+        self.p = l.p
+        self.base = irreducible_polynomials(l.p, min(max_degree, l.f_x_degree - 1))
+
+        # The constants GF(p)^* form the subgroup of l^* of order p-1, generated by g^((|l|-1)/(p-1)), so the
+        # logarithm of a constant c is (|l|-1)/(p-1) * k where k is the logarithm of c in that subgroup.
+        cofactor = (l.field_size - 1) // (l.p - 1)
+        constant_generator = (g ** cofactor).a[0]
+        self.constant_logs = {}
+        power = 1
+        for k in range(l.p - 1):
+            self.constant_logs.setdefault(power, cofactor * k)
+            power = (power * constant_generator) % l.p
+
+    def factor(self, element: FiniteFieldElement):
+        """
+        This function factors an element over the factor base.
+        :param element: a non-zero element of l
+        :return: the pair (offset, exponents) where offset is the logarithm of the leading coefficient of the element and
+        exponents maps base indices to exponents, or None if the element is not smooth
+
+        """
+        p = self.p
+        remainder = poly_trim(element.a)
+        leading_coeff = remainder[-1]
+        if leading_coeff not in self.constant_logs:
+            return None  # g does not generate the constants, so it is not a generator
+        inverse_leading = PrimeFieldElement(leading_coeff, p).inverse().a
+        remainder = [(coeff * inverse_leading) % p for coeff in remainder]
+        exponents = {}
+        for idx, f in enumerate(self.base):
+            if len(remainder) < len(f):
+                break  # the base is ordered by degree
+            quotient, residue = poly_divmod(remainder, f, p)
+            while not residue:
+                remainder = quotient
+                exponents[idx] = exponents.get(idx, 0) + 1
+                quotient, residue = poly_divmod(remainder, f, p)
+        if len(remainder) != 1:
+            return None
+        return self.constant_logs[leading_coeff], exponents
+
+    def __len__(self):
+        return len(self.base)
+
+
+def element_coefficients(element):
+    """
+    This function normalizes the coefficients of an element, so that equal elements given by coefficient vectors of
+    different lengths compare equal.
+    :param element: a PrimeFieldElement or a FiniteFieldElement
+    :return: the tuple of the element's coefficients, padded with zeros to the extension degree of its field
+
+    """
+    if isinstance(element, FiniteFieldElement):
+        return tuple(element.a) + (0,) * (element.l.f_x_degree - len(element.a))
+    return (element.a,)
+
+
+def is_generator(g, group_order):
+    """
+    This function checks whether an element generates the multiplicative group, i.e. whether g^(order/r) is not the
+    identity for every prime r dividing the group order.
+    :param g: a non-zero PrimeFieldElement or FiniteFieldElement
+    :param group_order: the order of the multiplicative group
+    :return: True if g is a generator, False otherwise
+
+    """
+    identity = element_coefficients(g ** 0)
+    return all(element_coefficients(g ** (group_order // r)) != identity for r in factorint(group_order))
+
+
+def collect_relations(g, factor_base, group_order, count, seed=None):
+    """
+    This function collects relations between the logarithms of the factor base by factoring random powers of g.
+    A relation (exponents, rhs) states that sum(e_i * log(base_i)) = rhs (mod group_order).
+    :param g: the generator element
+    :param factor_base: the factor base (PrimeFactorBase or PolynomialFactorBase)
+    :param group_order: the order of the multiplicative group
+    :param count: the number of relations to collect
+    :param seed: the seed of the random exponents
+    :return: list of relations
+
+    """
+    rng = random.Random(seed)
+    relations = []
+    while len(relations) < count:
+        k = rng.randrange(1, group_order)
+        factorization = factor_base.factor(g ** k)
+        if factorization is not None:
+            offset, exponents = factorization
+            relations.append((exponents, (k - offset) % group_order))
+    return relations
+
+
+def solve_relations_mod_prime_power(relations, size, q, modulus):
+    """
+    This function solves a sparse linear system modulo a prime power q^e by Gaussian elimination. Rows are kept as
+    dictionaries of their non-zero entries and only coefficients which are units modulo q serve as pivots.
+    :param relations: list of (exponents, rhs) rows
+    :param size: the number of unknowns
+    :param q: the prime
+    :param modulus: the prime power q^e
+    :return: list of the unknowns modulo q^e, or None if the relations do not determine all of them
+
+    """
+    pivots = {}  # pivot column -> (row, rhs) with row[column] == 1, in insertion order
+    for exponents, rhs in relations:
+        row = {idx: e % modulus for idx, e in exponents.items() if e % modulus}
+        rhs %= modulus
+        # a pivot row only contains columns which were not pivots when it was inserted, so a single pass in insertion
+        # order clears all pivot columns from the row
+        for column, (pivot_row, pivot_rhs) in pivots.items():
+            factor = row.get(column)
+            if factor is None:
+                continue
+            for idx, e in pivot_row.items():
+                value = (row.get(idx, 0) - factor * e) % modulus
+                if value:
+                    row[idx] = value
+                else:
+                    row.pop(idx, None)
+            rhs = (rhs - factor * pivot_rhs) % modulus
+        column = next((idx for idx, e in row.items() if e % q), None)
+        if column is None:
+            continue  # the row is dependent on the pivots, or has no unit coefficient
+        _, inverse, _ = xgcd(row[column], modulus)
+        pivots[column] = ({idx: (e * inverse) % modulus for idx, e in row.items()}, (rhs * inverse) % modulus)
+        if len(pivots) == size:
+            break
+    if len(pivots) < size:
+        return None
+
+    # back substitution: every non-pivot entry of a pivot row is a column pivoted after it
+    solution = [0] * size
+    for column, (pivot_row, pivot_rhs) in reversed(pivots.items()):
+        value = pivot_rhs
+        for idx, e in pivot_row.items():
+            if idx != column:
+                value -= e * solution[idx]
+        solution[column] = value % modulus
+    return solution
+
+
+def solve_relations(relations, size, group_order):
+    """
+    This function solves the relations modulo the group order, by solving them modulo every prime power dividing the
+    order and combining the solutions with the Chinese remainder theorem.
+    :param relations: list of (exponents, rhs) rows
+    :param size: the number of unknowns
+    :param group_order: the order of the multiplicative group
+    :return: list of the unknowns modulo the group order, or None if the relations do not determine all of them
+
+    """
+    solution = [0] * size
+    modulus_so_far = 1
+    for q, multiplicity in factorint(group_order).items():
+        modulus = q ** multiplicity
+        partial = solve_relations_mod_prime_power(relations, size, q, modulus)
+        if partial is None:
+            return None
+        _, s, _ = xgcd(modulus_so_far, modulus)  # s is the inverse of modulus_so_far modulo the prime power
+        solution = [(x + modulus_so_far * ((y - x) * s % modulus)) for x, y in zip(solution, partial)]
+        modulus_so_far *= modulus
+    return solution
+
+
+# per-process state of the IndexCalculusSolver pool workers, set by _init_worker
+_worker_context = {}
+
+
+def _init_worker(g, factor_base, group_order):
+    _worker_context["g"] = g
+    _worker_context["factor_base"] = factor_base
+    _worker_context["group_order"] = group_order
+
+
+def _collect_in_worker(task):
+    count, seed = task
+    ctx = _worker_context
+    return collect_relations(ctx["g"], ctx["factor_base"], ctx["group_order"], count, seed)
+
+
+class IndexCalculusSolver:
+    """
+    This class solves discrete logarithms to the base g by index calculus, in a prime field (g is a PrimeFieldElement)
+    or in an extension field of a small prime (g is a FiniteFieldElement).
+    On construction, relations between the logarithms of a factor base are collected from smooth powers of g and
+    solved modulo the group order. A logarithm of h is then read from a single smooth element h*g^s.
+    NOTE: g must be a generator of the multiplicative group, which is checked on construction; results are verified
+    before being returned.
+    """
+
+    def __init__(self, g, factor_bound=None, processes=1, seed=None):
+        """
+        Initialize an index calculus solver.
+        :param g: the generator element
+        :param factor_bound: the smoothness bound - the largest prime of the base in a prime field, or the highest
+        degree of the base polynomials in an extension field (a sub-exponential default is chosen if not given)
+        :param processes: the number of worker processes collecting relations (1 collects in the calling process)
+        :param seed: the seed of the random exponents
+        """
+        self.g = g
+        self.rng = random.Random(seed)
+        if isinstance(g, PrimeFieldElement):
+            self.group_order = g.p - 1
+            is_0 = g.a == 0
+        elif isinstance(g, FiniteFieldElement):
+            self.group_order = g.l.field_size - 1
+            is_0 = g.is_0
+        else:
+            raise ValueError("The generator must be a PrimeFieldElement or a FiniteFieldElement.")
+        if self.group_order < 2:
+            raise ValueError("The multiplicative group must be non-trivial.")
+        # relations over a non-generator never determine the logarithms of the whole factor base
+        if is_0 or not is_generator(g, self.group_order):
+            raise ValueError("The given element is not a generator of the multiplicative group.")
+
+        if isinstance(g, PrimeFieldElement):
+            if factor_bound is None:
+                # L_p[1/2, 1/sqrt(2)] balances the cost of finding smooth elements against the factor base size
+                factor_bound = max(10, int(exp(sqrt(log(g.p) * log(log(g.p)) / 2))))
+            self.factor_base = PrimeFactorBase(g.p, factor_bound)
+        else:
+            if factor_bound is None:
+                factor_bound = max(1, isqrt(g.l.f_x_degree))
+            self.factor_base = PolynomialFactorBase(g, factor_bound)
+        self.processes = processes
+        self.factor_base_logs = self._factor_base_logs()
+
+    def _factor_base_logs(self):
+        """
+        Collect relations in batches until they determine the logarithms of the factor base.
+        :return: list of the logarithms of the factor base elements
+        """
+        size = len(self.factor_base)
+        batch = size + 10
+        relations = []
+        pool = None
+        if self.processes != 1:
+            pool = Pool(self.processes, initializer=_init_worker,
+                        initargs=(self.g, self.factor_base, self.group_order))
+        try:
+            while True:
+                if pool is None:
+                    relations += collect_relations(self.g, self.factor_base, self.group_order, batch,
+                                                   self.rng.getrandbits(64))
+                else:
+                    workers = self.processes or os.cpu_count()
+                    tasks = [(-(-batch // workers), self.rng.getrandbits(64)) for _ in range(workers)]
+                    for worker_relations in pool.imap_unordered(_collect_in_worker, tasks):
+                        relations += worker_relations
+                logs = solve_relations(relations, size, self.group_order)
+                if logs is not None:
+                    return logs
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+    def solve(self, h):
+        """
+        Compute the discrete logarithm of an element.
+        :param h: the element whose discrete logarithm is computed
+        :return: the exponent t such that g^t = h
+        """
+        if isinstance(self.g, PrimeFieldElement):
+            if not isinstance(h, PrimeFieldElement) or h.p != self.g.p:
+                raise ValueError("The elements must be from the same field.")
+            is_0 = h.a == 0
+        else:
+            if not isinstance(h, FiniteFieldElement) or h.l != self.g.l:
+                raise ValueError("The elements must be from the same field.")
+            is_0 = h.is_0
+        if is_0:
+            raise ValueError("The discrete logarithm of the zero element is not defined.")
+        while True:
+            s = self.rng.randrange(self.group_order)
+            factorization = self.factor_base.factor(h * self.g ** s)
+            if factorization is None:
+                continue
+            offset, exponents = factorization
+            t = (offset + sum(e * self.factor_base_logs[idx] for idx, e in exponents.items()) - s) % self.group_order
+            if element_coefficients(self.g ** t) != element_coefficients(h):
+                raise ValueError("The result is not found - are you sure the element is a generator?")
+            return t
@@ -1,4 +1,5 @@
 from utilities import *
+from instrumentation import instrumented
 
 
 class PrimeFieldElement:
@@ -23,24 +24,28 @@ class PrimeFieldElement:
         self.a = a % p
         self.p = p
 
+    @instrumented
     def __add__(self, other):
         if isinstance(other, PrimeFieldElement) and self.p == other.p:
             return PrimeFieldElement((self.a + other.a), self.p)
         else:
             raise ValueError("Cannot perform addition of elements with different prime fields")
 
+    @instrumented
     def __sub__(self, other):
         if isinstance(other, PrimeFieldElement) and self.p == other.p:
             return PrimeFieldElement((self.a - other.a), self.p)
         else:
             raise ValueError("Cannot perform subtraction with different prime fields")
 
+    @instrumented
     def __mul__(self, other):
         if isinstance(other, PrimeFieldElement) and self.p == other.p:
             return PrimeFieldElement((self.a * other.a), self.p)
         else:
             raise ValueError("Cannot perform multiplication with different prime fields")
 
+    @instrumented
     def inverse(self):
         """
         This method computes the inverse of a given element in GF(p).
@@ -57,6 +62,7 @@ class PrimeFieldElement:
                     "the gcd of any non-zero element above a prime field with the prime defining the field should be 1")
             return PrimeFieldElement(s, p)
 
+    @instrumented
     def __truediv__(self, other):
         if isinstance(other, PrimeFieldElement) and self.p == other.p:
             # sanity check to ensure that the divider is not zero
@@ -75,6 +81,7 @@ class PrimeFieldElement:
             return self.a == other.a and self.p == other.p
         return False
 
+    @instrumented
     def __pow__(self, power, modulo=None):
         return PrimeFieldElement(pow(self.a, power, self.p), self.p)
 
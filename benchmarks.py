@@ -0,0 +1,337 @@
+import argparse
+import ast
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from math import ceil, isqrt
+
+from galois import irreducible_poly
+
+from BSGS import BSGS
+from FiniteField import FiniteField
+from FiniteFieldElement import FiniteFieldElement
+from instrumentation import Profiler
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+EXAMPLES_PATH = os.path.join(REPO_DIR, "polyexamples.txt")
+
+# fields beyond those of polyexamples.txt, given as (p, extension degree)
+SYNTHETIC_FIELDS = [(2, 20), (3, 12), (7, 8), (1009, 4), (65537, 2)]
+
+# default grid of the scaling mode
+SCALING_PRIMES = [2, 3, 5, 7, 11, 13]
+SCALING_DEGREES = [2, 3, 4, 6, 8]
+
+
+def read_polyexamples(path):
+    """
+    This function reads the irreducible polynomials listed in polyexamples.txt.
+    :param path: the path of the examples file
+    :return: list of (p, f_x) pairs where f_x is the coefficient list [a_0, a_1, ..., a_n]
+
+    """
+    examples = []
+    p = None
+    with open(path) as examples_file:
+        for line in examples_file:
+            line = line.strip()
+            if line.startswith("p ="):
+                p = int(line.split("=")[1])
+            elif line.startswith("[") and p is not None:
+                examples.append((p, ast.literal_eval(line)))
+    return examples
+
+
+def synthetic_field(p, n):
+    """
+    This function returns a field extension of GF(p) of degree n defined by a fixed irreducible polynomial.
+    :param p: the prime that characterizes the prime field GF(p)
+    :param n: the extension degree
+    :return: the coefficient list [a_0, a_1, ..., a_n] of the irreducible polynomial
+
+    """
+    coeffs = irreducible_poly(p, n, method="min").coeffs.tolist()  # galois lists the highest degree first
+    return [int(coeff) for coeff in reversed(coeffs)]
+
+
+def random_element(l: FiniteField, rng, non_zero=True):
+    """
+    This function draws a random element of a finite field.
+    :param l: the finite field
+    :param rng: the random generator
+    :param non_zero: whether the zero element is excluded
+    :return: the random element
+
+    """
+    while True:
+        element = FiniteFieldElement(l, [rng.randrange(l.p) for _ in range(l.f_x_degree)])
+        if not (non_zero and element.is_0):
+            return element
+
+
+def percentile(sorted_values, fraction):
+    """
+    This function computes a percentile of sorted values by the nearest-rank method.
+    :param sorted_values: the values in ascending order
+    :param fraction: the percentile as a fraction in [0, 1]
+    :return: the percentile
+
+    """
+    rank = max(1, ceil(len(sorted_values) * fraction))
+    return sorted_values[rank - 1]
+
+
+class Operation:
+    """
+    This class describes a benchmarked operation: a setup function preparing the timed callable for a field (untimed),
+    and an applicability check which skips fields where a single run would be too slow or is not defined.
+    """
+
+    def __init__(self, name, setup, skip_reason):
+        """
+        Initialize an operation.
+        :param name: the name of the operation
+        :param setup: function (l, rng) -> callable running the operation once
+        :param skip_reason: function (l, args) -> reason for skipping the field, or None if it is benchmarked
+        """
+        self.name = name
+        self.setup = setup
+        self.skip_reason = skip_reason
+
+
+def _setup_mul(l, rng):
+    x, y = random_element(l, rng), random_element(l, rng)
+    return lambda: x * y
+
+
+def _setup_truediv(l, rng):
+    x, y = random_element(l, rng), random_element(l, rng)
+    return lambda: x / y
+
+
+def _setup_multiplicative_order(l, rng):
+    x = random_element(l, rng)
+    return lambda: x.multiplicative_order()
+
+
+def _setup_find_generator(l, rng):
+    return lambda: l.find_generator()
+
+
+def _setup_bsgs(l, rng):
+    g = l.find_generator()
+    h = random_element(l, rng)
+    return lambda: BSGS(l, g, h)
+
+
+def _skip_truediv(l, args):
+    if l.f_x_degree > args.max_division_degree:
+        return f"extension degree above --max-division-degree ({args.max_division_degree})"
+    return None
+
+
+def _skip_multiplicative_order(l, args):
+    if l.field_size > args.max_order_field_size:
+        return f"field size above --max-order-field-size ({args.max_order_field_size})"
+    return None
+
+
+def _skip_find_generator(l, args):
+    if l.field_size > args.max_generator_field_size:
+        return f"field size above --max-generator-field-size ({args.max_generator_field_size})"
+    return None
+
+
+def _skip_bsgs(l, args):
+    if isqrt(l.field_size) ** 2 != l.field_size:
+        return "BSGS requires the field size to be a perfect square"
+    if l.field_size > args.max_bsgs_field_size:
+        return f"field size above --max-bsgs-field-size ({args.max_bsgs_field_size})"
+    return None
+
+
+OPERATIONS = {
+    "mul": Operation("mul", _setup_mul, lambda l, args: None),
+    "truediv": Operation("truediv", _setup_truediv, _skip_truediv),
+    "multiplicative_order": Operation("multiplicative_order", _setup_multiplicative_order, _skip_multiplicative_order),
+    "find_generator": Operation("find_generator", _setup_find_generator, _skip_find_generator),
+    "BSGS": Operation("BSGS", _setup_bsgs, _skip_bsgs),
+}
+
+
+def run_benchmark(l: FiniteField, operation: Operation, args):
+    """
+    This function benchmarks an operation above a field. The operation runs until args.samples runs or args.max_time
+    seconds elapse (at least once), then a few more runs are traced for memory, apart from the timed runs. With
+    args.profile, one more run counts the instrumented operations it performs.
+    :param l: the finite field
+    :param operation: the benchmarked operation
+    :param args: the parsed command line arguments
+    :return: a dictionary of the results
+
+    """
+    result = {
+        "p": l.p,
+        "f_x": [int(coeff) for coeff in l.f_x_original],
+        "degree": l.f_x_degree,
+        "field_size": l.field_size,
+        "operation": operation.name,
+    }
+    reason = operation.skip_reason(l, args)
+    if reason is not None:
+        result["skipped"] = reason
+        return result
+
+    rng = random.Random(f"{args.seed}:{l.p}:{l.f_x_original}:{operation.name}")
+    run = operation.setup(l, rng)
+    run()  # warm up
+
+    latencies = []
+    deadline = time.perf_counter() + args.max_time
+    while len(latencies) < args.samples and (not latencies or time.perf_counter() < deadline):
+        start = time.perf_counter_ns()
+        run()
+        latencies.append(time.perf_counter_ns() - start)
+
+    peak_memory = 0
+    tracemalloc.start()
+    try:
+        for _ in range(min(args.memory_samples, len(latencies))):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            run()
+            peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    if args.profile:
+        with Profiler() as profiler:
+            run()
+        result["operation_counts"] = {name: profiler.calls(name) for name in sorted(profiler.total_ns)}
+
+    latencies.sort()
+    result.update({
+        "samples": len(latencies),
+        "ops_per_sec": len(latencies) / (sum(latencies) / 1e9),
+        "latency_ns": {
+            "mean": sum(latencies) / len(latencies),
+            "p50": percentile(latencies, 0.5),
+            "p90": percentile(latencies, 0.9),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1],
+        },
+        "peak_memory_bytes": peak_memory,
+    })
+    return result
+
+
+def git_state():
+    """
+    This function identifies the checkout the benchmarks run from, whatever the current directory is.
+    :return: the pair (commit, dirty) where dirty tells whether tracked files have uncommitted changes, or
+    (None, None) if the benchmarks do not run from a git checkout
+
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+def benchmark_fields(args):
+    """
+    This function lists the fields of a run: the polyexamples.txt fields and the synthetic fields, or the grid of
+    primes and degrees in scaling mode.
+    :param args: the parsed command line arguments
+    :return: list of (p, f_x) pairs
+
+    """
+    if args.scaling:
+        return [(p, synthetic_field(p, n)) for p in args.primes for n in args.degrees]
+    return read_polyexamples(args.examples) + [(p, synthetic_field(p, n)) for p, n in SYNTHETIC_FIELDS]
+
+
+def parse_int_list(value):
+    return [int(item) for item in value.split(",")]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark finite field arithmetic, order finding and discrete log.")
+    parser.add_argument("--examples", default=EXAMPLES_PATH, help="the irreducible polynomials file")
+    parser.add_argument("--operations", type=lambda value: value.split(","), default=list(OPERATIONS),
+                        help=f"comma separated operations (default: {','.join(OPERATIONS)})")
+    parser.add_argument("--scaling", action="store_true",
+                        help="sweep the extension degree n and the prime p instead of the fixed fields")
+    parser.add_argument("--primes", type=parse_int_list, default=SCALING_PRIMES,
+                        help="comma separated primes of the scaling mode")
+    parser.add_argument("--degrees", type=parse_int_list, default=SCALING_DEGREES,
+                        help="comma separated extension degrees of the scaling mode")
+    parser.add_argument("--samples", type=int, default=100, help="the number of timed runs per benchmark")
+    parser.add_argument("--max-time", type=float, default=2.0, help="the time budget in seconds per benchmark")
+    parser.add_argument("--memory-samples", type=int, default=3, help="the number of memory-traced runs")
+    # order finding is linear in the field size, so these operations are skipped above the given field sizes
+    parser.add_argument("--max-order-field-size", type=int, default=2 ** 18,
+                        help="the largest field for multiplicative_order")
+    parser.add_argument("--max-generator-field-size", type=int, default=2 ** 18,
+                        help="the largest field for find_generator")
+    parser.add_argument("--max-bsgs-field-size", type=int, default=2 ** 18,
+                        help="the largest field for BSGS (its setup finds a generator)")
+    parser.add_argument("--max-division-degree", type=int, default=12,
+                        help="the highest extension degree for truediv")
+    parser.add_argument("--profile", action="store_true",
+                        help="count the instrumented operations performed by a run of every benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the benchmarked elements")
+    parser.add_argument("--output", help="the JSON report path (default: standard output)")
+    args = parser.parse_args(argv)
+    unknown = set(args.operations) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"unknown operations: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+    for p, f_x in benchmark_fields(args):
+        l = FiniteField(p, f_x)
+        for name in args.operations:
+            result = run_benchmark(l, OPERATIONS[name], args)
+            results.append(result)
+            status = result.get("skipped") or f"{result['ops_per_sec']:.1f} ops/sec"
+            print(f"{l} {name}: {status}", file=sys.stderr)
+
+    commit, dirty = git_state()
+    report = {
+        "metadata": {
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mode": "scaling" if args.scaling else "fields",
+            "seed": args.seed,
+            "samples": args.samples,
+            "max_time": args.max_time,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
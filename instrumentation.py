@@ -0,0 +1,191 @@
+import functools
+import time
+from collections import defaultdict
+
+# the profiler recording the instrumented operations, None when instrumentation is disabled
+registry = None
+
+
+def field_label(args):
+    """
+    This function names the field an instrumented operation is performed above, from the first argument of the call
+    which is an element, a field, or an object holding its field in an 'l' attribute.
+    :param args: the positional arguments of the call
+    :return: the name of the field, or None if no argument is related to a field
+
+    """
+    for obj in args:
+        field = getattr(obj, "l", obj)
+        if hasattr(field, "f_x_degree"):
+            return str(field)
+        if hasattr(obj, "p") and hasattr(obj, "a"):
+            return f"F_{obj.p}"
+    return None
+
+
+def instrumented(func):
+    """
+    This decorator records the calls of a function or method in the active profiler.
+    The wrapper is installed once, at definition, and only checks the global registry when instrumentation is
+    disabled, so references taken before a profiler is activated (e.g. bound methods) are recorded as well.
+    """
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = registry
+        if profiler is None:
+            return func(*args, **kwargs)
+        return profiler.call(name, func, args, kwargs)
+
+    return wrapper
+
+
+class Profiler:
+    """
+    This class records the instrumented operations performed while it is active: the number of calls per operation and
+    field, the time spent in every operation (inclusive of the operations it calls), and the time every operation
+    spends in each operation it calls, directly or indirectly.
+    A profiler is activated either as a context manager, or globally by enable().
+    NOTE: recursive calls are counted, but only the outermost call of an operation adds to its time.
+    NOTE: only calls in the current process are recorded; operations run by worker processes (BSGSSolver.solve_many,
+    parallel relation collection of IndexCalculusSolver) are not profiled.
+    """
+
+    def __init__(self):
+        self.counts = defaultdict(int)  # (operation, field) -> number of calls
+        self.total_ns = defaultdict(int)  # operation -> inclusive time
+        self.callers = defaultdict(int)  # (direct caller, operation) -> number of calls
+        self.nested_ns = defaultdict(int)  # (ancestor, operation) -> time of the operation within the ancestor
+        self._stack = []
+        self._previous = []
+
+    def call(self, name, func, args, kwargs):
+        """
+        Run an instrumented function and record the call.
+        :param name: the name of the operation
+        :param func: the instrumented function
+        :param args: the positional arguments of the call
+        :param kwargs: the keyword arguments of the call
+        :return: the result of the call
+        """
+        stack = self._stack
+        outermost = name not in stack
+        caller = stack[-1] if stack else None
+        stack.append(name)
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            stack.pop()
+            self.counts[(name, field_label(args))] += 1
+            self.callers[(caller, name)] += 1
+            if outermost:
+                self.total_ns[name] += elapsed
+                for ancestor in set(stack):
+                    self.nested_ns[(ancestor, name)] += elapsed
+
+    def calls(self, name):
+        """
+        Count the calls of an operation above all fields.
+        :param name: the name of the operation, e.g. 'FiniteFieldElement.__mul__'
+        :return: the number of calls
+        """
+        return sum(count for (operation, _), count in self.counts.items() if operation == name)
+
+    def share(self, ancestor, name):
+        """
+        Compute the share of the time of an operation spent in another operation it calls, directly or indirectly.
+        :param ancestor: the name of the calling operation, e.g. 'FiniteField.find_generator'
+        :param name: the name of the called operation, e.g. 'FiniteFieldElement.calc_matrix_representation'
+        :return: the share as a fraction in [0, 1]
+        """
+        if not self.total_ns.get(ancestor):
+            return 0.0
+        return self.nested_ns.get((ancestor, name), 0) / self.total_ns[ancestor]
+
+    def reset(self):
+        """
+        Discard every recorded call.
+        """
+        for records in (self.counts, self.total_ns, self.callers, self.nested_ns):
+            records.clear()
+
+    def as_dict(self):
+        """
+        Summarize the recorded calls in a JSON serializable form.
+        :return: dictionary of the calls and times per operation, the calls per field and the time attribution
+        """
+        operations = {}
+        for (name, field), count in sorted(self.counts.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+            entry = operations.setdefault(name, {"calls": 0, "total_ns": self.total_ns.get(name, 0), "fields": {},
+                                                 "callers": {}})
+            entry["calls"] += count
+            entry["fields"][field] = count
+        for (caller, name), count in self.callers.items():
+            operations[name]["callers"][caller] = count
+        for name, entry in operations.items():
+            entry["nested_share"] = {callee: self.share(name, callee) for (ancestor, callee) in self.nested_ns
+                                     if ancestor == name}
+        return operations
+
+    def report(self, root=None):
+        """
+        Format the recorded calls as a text table.
+        :param root: the name of an operation whose time is broken down by the operations it calls
+        :return: the report
+        """
+        lines = [f"{'operation':<48}{'calls':>10}{'total ms':>12}{'mean us':>12}"]
+        for name in sorted(self.total_ns, key=self.total_ns.get, reverse=True):
+            calls = self.calls(name)
+            lines.append(f"{name:<48}{calls:>10}{self.total_ns[name] / 1e6:>12.3f}"
+                         f"{self.total_ns[name] / calls / 1e3:>12.1f}")
+        lines.append("")
+        lines.append(f"{'operation':<48}{'calls':>10}  field")
+        for (name, field), count in sorted(self.counts.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+            lines.append(f"{name:<48}{count:>10}  {field if field is not None else '-'}")
+        if root is not None:
+            lines.append("")
+            lines.append(f"share of {root} time:")
+            shares = [(self.share(root, name), name) for (ancestor, name) in self.nested_ns if ancestor == root]
+            for share, name in sorted(shares, reverse=True):
+                lines.append(f"  {name:<46}{share:>11.1%}")
+        return "\n".join(lines)
+
+    def __enter__(self):
+        global registry
+        self._previous.append(registry)
+        registry = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global registry
+        registry = self._previous.pop()
+
+    def __str__(self):
+        return self.report()
+
+
+def enable(profiler=None):
+    """
+    This function activates a profiler globally, until disable() is called.
+    :param profiler: the profiler to activate (a new one if not given)
+    :return: the active profiler
+
+    """
+    global registry
+    registry = profiler if profiler is not None else Profiler()
+    return registry
+
+
+def disable():
+    """
+    This function deactivates the global profiler.
+    :return: the profiler which was active, if any
+
+    """
+    global registry
+    profiler = registry
+    registry = None
+    return profiler
@@ -1,7 +1,16 @@
+import os
+import tempfile
 import unittest
 
+import numpy as np
+
+import benchmarks
+import instrumentation
+from BSGS import BabyStepTable, BSGSSolver, baby_steps_path
 from FiniteField import FiniteField
 from FiniteFieldElement import FiniteFieldElement
+from IndexCalculus import IndexCalculusSolver, irreducible_polynomials
+from PrimeFieldElement import PrimeFieldElement
 
 
 class TestFiniteFieldElement(unittest.TestCase):
@@ -148,3 +157,252 @@ class TestElementExponent(unittest.TestCase):
         z = x ** t
         check_element = FiniteFieldElement(field, [1, 0])
         self.assertEqual(check_element, z)
+
+
+class TestBSGSSolver(unittest.TestCase):
+    def setUp(self):
+        self.field = FiniteField(7, [3, 6, 1])
+        self.generator = self.field.find_generator()
+
+    def test_solve(self):
+        solver = BSGSSolver(self.field, self.generator)
+        for element in self.field.elements():
+            if element.is_0:
+                continue
+            t = solver.solve(element)
+            self.assertEqual(self.generator ** t, element)
+
+    def test_solve_zero_element(self):
+        solver = BSGSSolver(self.field, self.generator)
+        with self.assertRaises(ValueError):
+            solver.solve(FiniteFieldElement(self.field, [0, 0]))
+
+    def test_solve_many(self):
+        targets = [FiniteFieldElement(self.field, [1, 3]), FiniteFieldElement(self.field, [4, 5]),
+                   FiniteFieldElement(self.field, [2, 0]), FiniteFieldElement(self.field, [0, 6])]
+        with BSGSSolver(self.field, self.generator, processes=2) as solver:
+            results = list(solver.solve_many(iter(targets)))
+        self.assertEqual(len(results), len(targets))
+        for h, t in results:
+            self.assertIn(h, targets)
+            self.assertEqual(self.generator ** t, h)
+
+    def test_solve_many_unsolvable_targets(self):
+        base = self.generator ** 2  # generates the squares only
+        targets = [FiniteFieldElement(self.field, [0, 0])] + [self.generator ** k for k in range(1, 9)]
+        with BSGSSolver(self.field, base, processes=2) as solver:
+            results = list(solver.solve_many(targets))
+        self.assertEqual(len(results), len(targets))
+        for h, t in results:
+            if isinstance(t, ValueError):
+                self.assertTrue(h.is_0 or h not in [base ** k for k in range(24)])
+            else:
+                self.assertEqual(base ** t, h)
+        self.assertEqual(sum(isinstance(t, ValueError) for _, t in results), 5)
+
+
+class TestBabyStepTableFile(unittest.TestCase):
+    def setUp(self):
+        self.field = FiniteField(7, [3, 6, 1])
+        self.generator = self.field.find_generator()
+        self.table_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.table_dir.cleanup()
+
+    def test_save_load(self):
+        table = BabyStepTable.build(self.field, self.generator, 7)
+        path = os.path.join(self.table_dir.name, "table.npy")
+        table.save(path)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o644)
+        mapped = BabyStepTable.load(path)
+        self.assertIsNotNone(mapped.mapped_file)
+        self.assertFalse(mapped.keys.flags.writeable)
+        np.testing.assert_array_equal(mapped.keys, table.keys)
+        np.testing.assert_array_equal(mapped.exponents, table.exponents)
+        self.assertEqual(mapped.lookup(1), 0)
+        mapped.close()
+        self.assertIsNone(mapped.mapped_file)
+        self.assertEqual(len(mapped), len(table))
+
+    def test_failed_save(self):
+        table = BabyStepTable(np.array([1, 2]), np.array(["not", "exponents"]))
+        with self.assertRaises(ValueError):
+            table.save(os.path.join(self.table_dir.name, "table.npy"))
+        self.assertEqual(os.listdir(self.table_dir.name), [])
+
+    def test_solver_with_table_dir(self):
+        BSGSSolver(self.field, self.generator, table_dir=self.table_dir.name)
+        self.assertEqual(len(os.listdir(self.table_dir.name)), 1)
+        solver = BSGSSolver(self.field, self.generator, table_dir=self.table_dir.name)
+        self.assertEqual(solver.table_path, baby_steps_path(self.table_dir.name, self.field, self.generator, 7))
+        self.assertIsNotNone(solver.table.mapped_file)
+        h = FiniteFieldElement(self.field, [4, 5])
+        self.assertEqual(self.generator ** solver.solve(h), h)
+        with solver:
+            results = list(solver.solve_many([h]))
+        self.assertEqual(self.generator ** results[0][1], h)
+        self.assertIsNone(solver.table)
+        with self.assertRaises(ValueError):
+            solver.solve(h)
+
+    def test_table_path_of_padded_generator(self):
+        short = FiniteFieldElement(self.field, [3])
+        padded = FiniteFieldElement(self.field, [3, 0])
+        self.assertEqual(baby_steps_path(self.table_dir.name, self.field, short, 7),
+                         baby_steps_path(self.table_dir.name, self.field, padded, 7))
+
+
+class TestIndexCalculus(unittest.TestCase):
+    def test_irreducible_polynomials(self):
+        irreducibles = irreducible_polynomials(2, 4)
+        self.assertEqual(len(irreducibles), 8)
+        self.assertIn([1, 1, 1], irreducibles)
+        self.assertIn([1, 1, 0, 0, 1], irreducibles)
+        self.assertNotIn([1, 0, 1], irreducibles)
+
+    def test_prime_field(self):
+        generator = PrimeFieldElement(2, 1019)
+        solver = IndexCalculusSolver(generator, seed=1)
+        for a in range(1, 1019):
+            h = PrimeFieldElement(a, 1019)
+            self.assertEqual(generator ** solver.solve(h), h)
+
+    def test_extension_field(self):
+        field = FiniteField(3, [2, 0, 0, 2, 1])
+        generator = field.find_generator()
+        solver = IndexCalculusSolver(generator, seed=1)
+        for element in field.elements():
+            if element.is_0:
+                continue
+            self.assertEqual(generator ** solver.solve(element), element)
+
+    def test_parallel_relation_collection(self):
+        generator = PrimeFieldElement(2, 1019)
+        solver = IndexCalculusSolver(generator, processes=2, seed=1)
+        h = PrimeFieldElement(5, 1019)
+        self.assertEqual(generator ** solver.solve(h), h)
+
+    def test_short_coefficient_vector(self):
+        field = FiniteField(3, [2, 0, 0, 2, 1])
+        generator = field.find_generator()
+        solver = IndexCalculusSolver(generator, seed=1)
+        h = FiniteFieldElement(field, [1, 2])
+        self.assertEqual((generator ** solver.solve(h)).a, [1, 2, 0, 0])
+
+    def test_non_generator(self):
+        with self.assertRaises(ValueError):
+            IndexCalculusSolver(PrimeFieldElement(4, 1019))
+        with self.assertRaises(ValueError):
+            IndexCalculusSolver(PrimeFieldElement(1018, 1019))
+        with self.assertRaises(ValueError):
+            IndexCalculusSolver(PrimeFieldElement(0, 1019))
+        field = FiniteField(3, [2, 0, 0, 2, 1])
+        generator = field.find_generator()
+        with self.assertRaises(ValueError):
+            IndexCalculusSolver(generator * generator)
+        with self.assertRaises(ValueError):
+            IndexCalculusSolver(FiniteFieldElement(field, [1]))
+
+    def test_invalid_elements(self):
+        solver = IndexCalculusSolver(PrimeFieldElement(2, 1019), seed=1)
+        with self.assertRaises(ValueError):
+            solver.solve(PrimeFieldElement(0, 1019))
+        with self.assertRaises(ValueError):
+            solver.solve(PrimeFieldElement(2, 1021))
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_read_polyexamples(self):
+        examples = benchmarks.read_polyexamples(benchmarks.EXAMPLES_PATH)
+        self.assertIn((2, [1, 1, 1]), examples)
+        self.assertIn((383, [378, 1, 0, 1]), examples)
+        for p, f_x in examples:
+            FiniteField(p, f_x)
+
+    def test_run_benchmark(self):
+        args = benchmarks.parse_args(["--samples", "5", "--max-time", "1"])
+        field = FiniteField(7, [3, 6, 1])
+        result = benchmarks.run_benchmark(field, benchmarks.OPERATIONS["BSGS"], args)
+        self.assertEqual(result["samples"], 5)
+        self.assertGreater(result["ops_per_sec"], 0)
+        self.assertLessEqual(result["latency_ns"]["p50"], result["latency_ns"]["p99"])
+        self.assertGreater(result["peak_memory_bytes"], 0)
+
+    def test_git_state_outside_repo_directory(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as other_dir:
+            os.chdir(other_dir)
+            try:
+                commit, dirty = benchmarks.git_state()
+            finally:
+                os.chdir(cwd)
+        self.assertIsNotNone(commit)
+        self.assertIn(dirty, (True, False))
+
+    def test_skipped_benchmark(self):
+        args = benchmarks.parse_args([])
+        field = FiniteField(7, [4, 0, 6, 1])
+        result = benchmarks.run_benchmark(field, benchmarks.OPERATIONS["BSGS"], args)
+        self.assertIn("skipped", result)
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.field = FiniteField(7, [3, 6, 1])
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(instrumentation.registry)
+        x = FiniteFieldElement(self.field, [1, 3])
+        self.assertEqual(x * x, x ** 2)
+
+    def test_bound_method_taken_before_activation(self):
+        x = FiniteFieldElement(self.field, [1, 3])
+        order = x.multiplicative_order
+        with instrumentation.Profiler() as profiler:
+            order()
+        self.assertEqual(profiler.calls("FiniteFieldElement.multiplicative_order"), 1)
+        self.assertGreater(profiler.calls("FiniteFieldElement.__mul__"), 0)
+
+    def test_benchmark_profile_counts_operation(self):
+        args = benchmarks.parse_args(["--samples", "1", "--memory-samples", "1", "--profile"])
+        for name, operation in [("find_generator", "FiniteField.find_generator"),
+                                ("multiplicative_order", "FiniteFieldElement.multiplicative_order"),
+                                ("BSGS", "BSGS")]:
+            field = FiniteField(3, [2, 1, 0, 0, 1]) if name == "BSGS" else self.field
+            result = benchmarks.run_benchmark(field, benchmarks.OPERATIONS[name], args)
+            self.assertEqual(result["operation_counts"][operation], 1)
+
+    def test_baby_step_table_labels(self):
+        generator = self.field.find_generator()
+        with instrumentation.Profiler() as profiler:
+            BSGSSolver(self.field, generator).solve(FiniteFieldElement(self.field, [4, 5]))
+        self.assertEqual(profiler.counts[("BabyStepTable.build", str(self.field))], 1)
+        self.assertGreater(profiler.counts[("BabyStepTable.lookup", str(self.field))], 0)
+        self.assertEqual(profiler.calls("BabyStepTable.lookup"),
+                         profiler.counts[("BabyStepTable.lookup", str(self.field))])
+
+    def test_context_manager(self):
+        x = FiniteFieldElement(self.field, [1, 3])
+        y = FiniteFieldElement(self.field, [4, 5])
+        with instrumentation.Profiler() as profiler:
+            x * y
+            x * y
+            x / y
+        self.assertIsNone(instrumentation.registry)
+        self.assertEqual(profiler.calls("FiniteFieldElement.__mul__"), 2)
+        self.assertEqual(profiler.calls("FiniteFieldElement.__truediv__"), 1)
+        self.assertEqual(profiler.calls("PrimeFieldElement.inverse"), 1)
+        self.assertEqual(profiler.counts[("FiniteFieldElement.__mul__", str(self.field))], 2)
+        self.assertEqual(profiler.callers[("FiniteFieldElement.__truediv__", "PrimeFieldElement.inverse")], 1)
+
+    def test_share(self):
+        profiler = instrumentation.enable()
+        try:
+            self.field.find_generator()
+        finally:
+            self.assertIs(instrumentation.disable(), profiler)
+        share = profiler.share("FiniteField.find_generator", "FiniteFieldElement.calc_matrix_representation")
+        self.assertGreater(share, 0)
+        self.assertLessEqual(share, 1)
+        self.assertIn("share of FiniteField.find_generator time:", profiler.report(root="FiniteField.find_generator"))